@@ -1,4 +1,5 @@
 
+import copy
 import json
 import os
 import pathlib
@@ -17,6 +18,7 @@ class ConnectionManager:
     
     def __init__(self, connections_path: Optional[str] = None):
         self.connections_path = connections_path or _default_connections_path()
+        self._connections: Optional[Dict] = None
         self._ensure_connections_file()
     
     def _ensure_connections_file(self) -> None:
@@ -31,17 +33,24 @@ class ConnectionManager:
                 json.dump({}, f, indent=2)
     
     def _load_connections(self) -> Dict:
-        """Load connections from JSON file."""
-        try:
-            with open(self.connections_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+        """Load connections from JSON file.
+
+        The file is parsed once and kept in memory. The returned mapping is the cache
+        itself; public methods copy only what they hand out or modify.
+        """
+        if self._connections is None:
+            try:
+                with open(self.connections_path, 'r') as f:
+                    self._connections = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._connections = {}
+        return self._connections
     
     def _save_connections(self, connections: Dict) -> None:
         """Save connections to JSON file."""
         with open(self.connections_path, 'w') as f:
             json.dump(connections, f, indent=2)
+        self._connections = connections
     
     def add_connection(self, name: str, host: str, port: int, user: str, 
                       password: str, mysqldump_path: Optional[str] = None,
@@ -58,7 +67,7 @@ class ConnectionManager:
                       bastion_user: Optional[str] = None,
                       bastion_key_path: Optional[str] = None) -> bool:
         """Add a new connection."""
-        connections = self._load_connections()
+        connections = copy.deepcopy(self._load_connections())
         
         if name in connections:
             return False  # Connection already exists
@@ -88,7 +97,7 @@ class ConnectionManager:
     
     def remove_connection(self, name: str) -> bool:
         """Remove a connection."""
-        connections = self._load_connections()
+        connections = copy.deepcopy(self._load_connections())
         
         if name not in connections:
             return False
@@ -99,17 +108,15 @@ class ConnectionManager:
     
     def get_connection(self, name: str) -> Optional[Dict]:
         """Get a connection by name."""
-        connections = self._load_connections()
-        return connections.get(name)
+        return copy.deepcopy(self._load_connections().get(name))
     
     def list_connections(self) -> List[str]:
         """List all connection names."""
-        connections = self._load_connections()
-        return list(connections.keys())
+        return list(self._load_connections())
     
     def get_all_connections(self) -> Dict:
         """Get all connections."""
-        return self._load_connections()
+        return copy.deepcopy(self._load_connections())
     
     def update_connection(self, name: str, host: Optional[str] = None,
                           port: Optional[int] = None, user: Optional[str] = None,
@@ -128,7 +135,7 @@ class ConnectionManager:
                           bastion_user: Optional[str] = None,
                           bastion_key_path: Optional[str] = None) -> bool:
         """Update an existing connection."""
-        connections = self._load_connections()
+        connections = copy.deepcopy(self._load_connections())
         
         if name not in connections:
             return False
@@ -1,26 +1,33 @@
 
 import click
+import functools
 import os
 import pathlib
-import shutil
-import subprocess
 import sys
-import datetime
 import re
-from dotenv import load_dotenv, dotenv_values
+from typing import Optional
+
+# Heavier modules (subprocess, dotenv, the gateways and their boto3/mysql deps) are
+# imported inside the functions that need them to keep startup fast for other commands.
 
 # Support running both as a package (relative imports) and as a script (absolute imports)
 try:  # package context
-    from ..data.database_gateway import DatabaseGateway  # type: ignore
-    from ..data.storage_gateway import StorageGateway  # type: ignore
-    from ..app.backup_use_case import BackupUseCase  # type: ignore
     from ..data.connection_manager import ConnectionManager  # type: ignore
 except Exception:  # script context
-    from data.database_gateway import DatabaseGateway  # type: ignore
-    from data.storage_gateway import StorageGateway  # type: ignore
-    from app.backup_use_case import BackupUseCase  # type: ignore
     from data.connection_manager import ConnectionManager  # type: ignore
 
+# Per-user crontab spool locations (Debian/Ubuntu, RHEL/Fedora, macOS, BSD)
+_CRONTAB_SPOOL_DIRS = (
+    "/var/spool/cron/crontabs",
+    "/var/spool/cron",
+    "/usr/lib/cron/tabs",
+    "/var/cron/tabs",
+)
+
+# HH:MM in 24h form; the groups also enforce 00-23 hours and 00-59 minutes
+_HHMM_RE = re.compile(r"^([01]\d|2[0-3]):([0-5]\d)$")
+
+
 def _default_config_path() -> str:
     # Follow XDG on Linux/macOS; fallback to ~/.config
     xdg = os.getenv("XDG_CONFIG_HOME")
@@ -28,33 +35,54 @@ def _default_config_path() -> str:
     return str(base / "database-backup" / ".env")
 
 
-def _ensure_config_file(config_path: str) -> None:
-    if os.path.exists(config_path):
-        return
+def _load_env(config_path: str) -> Optional[dict]:
+    """Return the parsed .env at config_path, or None if it does not exist."""
+    if not os.path.isfile(config_path):
+        return None
+    from dotenv import dotenv_values
+    return dict(dotenv_values(config_path))
+
+
+def _ensure_config_file(config_path: str) -> dict:
+    """Return the parsed config, creating it interactively first if it is missing."""
+    env = _load_env(config_path)
+    if env is not None:
+        return env
 
     click.echo(f"Config not found at {config_path} — let's create one.")
-    # Ensure directory exists
-    cfg_dir = os.path.dirname(config_path)
-    if cfg_dir and not os.path.exists(cfg_dir):
-        os.makedirs(cfg_dir, exist_ok=True)
+    _init_config_interactive(config_path, exists=False)
+    return _load_env(config_path) or {}
+
 
-    _init_config_interactive(config_path)
+def _ensure_config_file_noninteractive(config_path: str) -> dict:
+    """Return the parsed config; fail fast instead of prompting when it is missing (e.g. under cron)."""
+    env = _load_env(config_path)
+    if env is None:
+        raise click.ClickException(
+            f"Config not found at {config_path}. Run 'db-backup init' to create one."
+        )
+    return env
 
 
-def _init_config_interactive(config_path: str) -> None:
-    """Interactively create or update a .env config file at config_path (storage/global settings only)."""
+def _init_config_interactive(config_path: str, exists: bool = True) -> None:
+    """Interactively create or update a .env config file at config_path (storage/global settings only).
+
+    Pass exists=False when the caller already knows the file is missing to skip re-checking it.
+    """
     # Load existing values (if any) to use as defaults
-    existing = dotenv_values(config_path) if os.path.exists(config_path) else {}
+    existing = _load_env(config_path) if exists else None
 
-    if os.path.exists(config_path):
+    if existing is not None:
         click.echo(f"Config exists at {config_path}.")
         if not click.confirm("Do you want to overwrite it?", default=False):
             click.echo("Aborted. Existing config left unchanged.")
             return
+    else:
+        existing = {}
 
     # Ensure directory exists
     cfg_dir = os.path.dirname(config_path)
-    if cfg_dir and not os.path.exists(cfg_dir):
+    if cfg_dir:
         os.makedirs(cfg_dir, exist_ok=True)
 
     click.echo("Setting up storage and global configuration...")
@@ -84,31 +112,30 @@ def _init_config_interactive(config_path: str) -> None:
     retention_count = click.prompt("Retention count (how many backups to keep)", default=retention_default, type=int)
 
     # Write .env (only storage/global settings)
-    lines = [
-        f"BACKUP_DRIVER={backup_driver}",
-        f"RETENTION_COUNT={retention_count}",
-    ]
+    body = f"BACKUP_DRIVER={backup_driver}\nRETENTION_COUNT={retention_count}\n"
     if backup_driver == "local":
-        lines.append(f"BACKUP_DIR={backup_dir}")
+        body += f"BACKUP_DIR={backup_dir}\n"
     else:
-        lines.extend([
-            f"S3_BUCKET={s3_bucket}",
-            f"S3_PATH={s3_path}",
-            f"AWS_ACCESS_KEY_ID={aws_access_key_id}",
-            f"AWS_SECRET_ACCESS_KEY={aws_secret_access_key}",
-        ])
-
-    with open(config_path, "w") as f:
-        f.write("\n".join(lines) + "\n")
+        body += (
+            f"S3_BUCKET={s3_bucket}\n"
+            f"S3_PATH={s3_path}\n"
+            f"AWS_ACCESS_KEY_ID={aws_access_key_id}\n"
+            f"AWS_SECRET_ACCESS_KEY={aws_secret_access_key}\n"
+        )
+
+    pathlib.Path(config_path).write_text(body)
     click.echo(f"Created config at {config_path}")
     click.echo("Use 'db-backup --add' to add database connections.")
 
 
+@functools.lru_cache(maxsize=1)
 def _resolve_executable() -> str:
     """Find a robust way to run the CLI from cron.
 
     Prefer the installed console script `db-backup`; fallback to `python -m db_backup`.
     """
+    import shutil
+
     exe = shutil.which("db-backup")
     if exe:
         return exe
@@ -122,17 +149,73 @@ def _times_to_cron_entries(times: list[str]) -> list[tuple[int, int]]:
         t = t.strip()
         if not t:
             continue
-        if not re.match(r"^\d{2}:\d{2}$", t):
+        match = _HHMM_RE.match(t)
+        if not match:
             raise click.ClickException(f"Invalid time format: '{t}'. Use HH:MM 24h, e.g. 03:00")
-        hh, mm = t.split(":")
-        h = int(hh)
-        m = int(mm)
-        if not (0 <= h <= 23 and 0 <= m <= 59):
-            raise click.ClickException(f"Time out of range: '{t}'")
-        entries.append((m, h))
+        entries.append((int(match[2]), int(match[1])))
     return entries
 
 
+def _read_crontab() -> str:
+    """Return the current user's crontab, or an empty string if there is none.
+
+    Reads the spool file directly when it is accessible; falls back to `crontab -l`.
+    """
+    import pwd
+    import subprocess
+
+    # Resolve the effective user like `crontab -l` does; $USER/$LOGNAME may name
+    # someone else after `su` or `sudo -E`
+    try:
+        user = pwd.getpwuid(os.geteuid()).pw_name
+    except KeyError:
+        user = None
+    if user:
+        for spool_dir in _CRONTAB_SPOOL_DIRS:
+            path = os.path.join(spool_dir, user)
+            if not os.access(path, os.R_OK):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8", errors="surrogateescape") as f:
+                    content = f.read()
+            except OSError:
+                continue
+            # Drop the header that crontab(1) prepends to spool files; `crontab -l` hides it too
+            if content.startswith("# DO NOT EDIT THIS FILE"):
+                content_lines = content.split("\n")
+                while content_lines and content_lines[0].startswith(("# DO NOT EDIT THIS FILE", "# (")):
+                    content_lines.pop(0)
+                content = "\n".join(content_lines)
+            return content
+
+    # Capture raw bytes and only decode stdout on success; stderr is never needed here
+    res = subprocess.run(["crontab", "-l"], capture_output=True)
+    if res.returncode != 0:
+        return ""
+    return res.stdout.decode("utf-8", "surrogateescape")
+
+
+def _write_crontab(content: str) -> tuple[int, str]:
+    """Install content as the current user's crontab; return (returncode, stderr)."""
+    import subprocess
+    import tempfile
+
+    # Normalise once so both install paths send identical bytes; some crons reject a missing final newline
+    data = (content if content.endswith("\n") else content + "\n").encode("utf-8", "surrogateescape")
+    try:
+        with tempfile.NamedTemporaryFile("wb", prefix="db-backup-", suffix=".cron", delete=False) as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+    except OSError:
+        res = subprocess.run(["crontab", "-"], input=data, capture_output=True)
+    else:
+        try:
+            res = subprocess.run(["crontab", tmp_path], capture_output=True)
+        finally:
+            os.unlink(tmp_path)
+    return res.returncode, res.stderr.decode("utf-8", "replace")
+
+
 def _install_crontab(lines: list[str]) -> None:
     """Install or update user's crontab with a managed db-backup block."""
     # Validate input lines are not empty
@@ -145,24 +228,33 @@ def _install_crontab(lines: list[str]) -> None:
         raise click.ClickException("No valid cron lines to install")
     
     # Read existing crontab
-    res = subprocess.run(["crontab", "-l"], capture_output=True, text=True)
-    existing = res.stdout if res.returncode == 0 else ""
+    existing = _read_crontab()
 
-    # Remove only comment markers (if any exist)
-    existing = re.sub(r"(?s)# BEGIN db-backup.*?# END db-backup\s*", "", existing)
-    
-    # Clean up existing crontab - remove comment markers but keep all cron entries
+    # Drop legacy managed blocks (BEGIN..END) and stray markers in a single pass,
+    # keeping all other lines including existing db-backup cron entries
     existing_lines = existing.split('\n') if existing else []
     filtered_existing = []
+    block_lines = None  # lines of an open BEGIN block, restored if it is never closed
     for line in existing_lines:
         line_stripped = line.strip()
-        # Skip only comment markers
-        if (line_stripped.startswith('# BEGIN db-backup') or 
-            line_stripped.startswith('# END db-backup') or
-            line_stripped.startswith('# Generated on')):
+        if line_stripped.startswith('# BEGIN db-backup'):
+            if block_lines is None:
+                block_lines = []
+            continue
+        if line_stripped.startswith('# END db-backup'):
+            block_lines = None
+            continue
+        if block_lines is not None:
+            block_lines.append(line)
+            continue
+        if line_stripped.startswith('# Generated on'):
             continue
-        # Keep all other lines including existing db-backup cron entries
         filtered_existing.append(line)
+    if block_lines is not None:
+        # Unterminated block: keep its contents, minus the marker lines
+        filtered_existing.extend(
+            ln for ln in block_lines if not ln.strip().startswith('# Generated on')
+        )
     
     existing = '\n'.join(filtered_existing).rstrip()
 
@@ -199,9 +291,9 @@ def _install_crontab(lines: list[str]) -> None:
                     f"Invalid crontab line {line_num}: '{line}' (expected at least 5 fields)"
                 )
 
-    apply_res = subprocess.run(["crontab", "-"], input=new_cron, text=True, capture_output=True)
-    if apply_res.returncode != 0:
-        err = apply_res.stderr.strip() or "failed to install crontab"
+    returncode, stderr = _write_crontab(new_cron)
+    if returncode != 0:
+        err = stderr.strip() or "failed to install crontab"
         # Show the problematic crontab for debugging
         click.echo(f"\nCrontab content that failed to install:")
         click.echo(new_cron)
@@ -214,13 +306,36 @@ def _is_cron_expression(s: str) -> bool:
     return len(parts) == 5
 
 
-def _setup_cron_interactive(config_path: str) -> None:
+def _build_cron_lines(schedule_str: str, cmd: str, default: str) -> list[str]:
+    """Turn a 5-field cron expression or comma-separated HH:MM list into crontab lines for cmd.
+
+    Falls back to the default expression when the schedule is empty or cannot be parsed.
+    """
+    schedule_str = (schedule_str or "").strip()
+    if not schedule_str:
+        click.echo(f"Using default schedule: {default}")
+        return [f"{default} {cmd}"]
+
+    if _is_cron_expression(schedule_str):
+        return [f"{schedule_str} {cmd}"]
+
+    times = [s.strip() for s in schedule_str.split(",") if s.strip()]
+    try:
+        pairs = _times_to_cron_entries(times)
+    except click.ClickException:
+        pairs = []
+    if not pairs:
+        click.echo(f"Warning: Invalid time format. Using default: {default}")
+        return [f"{default} {cmd}"]
+    return [f"{m} {h} * * * {cmd}" for m, h in pairs]
+
+
+def _setup_cron_interactive(config_path: str, conn_manager: ConnectionManager) -> None:
     click.echo("Let's set up your cron schedule for db-backup.")
     # Ensure config exists so cron can use it
     _ensure_config_file(config_path)
 
     # Check for connections
-    conn_manager = ConnectionManager()
     connections = conn_manager.list_connections()
     
     connection_name = None
@@ -229,15 +344,7 @@ def _setup_cron_interactive(config_path: str) -> None:
             connection_name = connections[0]
             click.echo(f"Using connection: {connection_name}")
         else:
-            click.echo("Available connections:")
-            for i, conn in enumerate(connections, 1):
-                click.echo(f"  {i}. {conn}")
-            choice = click.prompt("Select connection for cron", type=int)
-            if 1 <= choice <= len(connections):
-                connection_name = connections[choice - 1]
-            else:
-                click.echo("Invalid selection.")
-                return
+            connection_name = click.prompt("Select connection for cron", type=click.Choice(connections))
     else:
         click.echo("No connections found. Please add a connection first with 'db-backup --add'")
         return
@@ -259,37 +366,6 @@ def _setup_cron_interactive(config_path: str) -> None:
         show_default=True,
     )
     
-    # Normalize the input - handle empty strings, whitespace, etc.
-    if schedule_input:
-        schedule_str = schedule_input.strip()
-    else:
-        schedule_str = default_schedule
-    
-    # If empty after stripping, use default
-    if not schedule_str:
-        schedule_str = default_schedule
-        click.echo(f"Using default schedule: {default_schedule}")
-
-    # Parse and validate the schedule
-    cron_expr = None
-    cron_pairs = []
-    
-    # Check if it's a cron expression (5 fields)
-    if _is_cron_expression(schedule_str):
-        cron_expr = schedule_str
-    else:
-        # Try to parse as time list (HH:MM format)
-        times = [s.strip() for s in schedule_str.split(",") if s.strip()]
-        if times:
-            try:
-                cron_pairs = _times_to_cron_entries(times)
-            except (click.ClickException, ValueError) as e:
-                click.echo(f"Warning: Invalid time format. Using default: {default_schedule}")
-                cron_expr = default_schedule
-        else:
-            # Empty or invalid, use default
-            cron_expr = default_schedule
-
     # Build the command
     exe = _resolve_executable()
     storage_flag = ""
@@ -297,60 +373,26 @@ def _setup_cron_interactive(config_path: str) -> None:
         storage_flag = f" --{storage_choice}"
     cmd = f"{exe} backup --config \"{config_path}\" --connection {connection_name}{storage_flag}"
 
-    # Generate cron lines - ensure we always have a valid expression
-    cron_lines = []
-    
-    if cron_expr:
-        # Use the cron expression directly
-        if _is_cron_expression(cron_expr):
-            cron_lines.append(f"{cron_expr} {cmd}")
-        else:
-            # Invalid, use default
-            cron_lines.append(f"{default_schedule} {cmd}")
-    elif cron_pairs:
-        # Use time pairs to generate cron lines
-        for m, h in cron_pairs:
-            cron_lines.append(f"{m} {h} * * * {cmd}")
-    else:
-        # Fallback to default
-        cron_lines.append(f"{default_schedule} {cmd}")
-    
-    # Final validation - ensure all lines are valid
-    validated_lines = []
-    for line in cron_lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Split and validate: should have at least 6 parts (5 cron fields + command start)
-        parts = line.split(None, 5)  # Split into max 6 parts
-        if len(parts) >= 6:
-            # Validate the first 5 parts are valid cron fields
-            minute, hour, day, month, weekday = parts[0], parts[1], parts[2], parts[3], parts[4]
-            # Basic validation - ensure they're not empty
-            if all(field.strip() for field in [minute, hour, day, month, weekday]):
-                validated_lines.append(line)
-            else:
-                click.echo(f"Warning: Invalid cron fields in line, using default")
-                validated_lines.append(f"{default_schedule} {cmd}")
-        else:
-            click.echo(f"Warning: Invalid cron line format (expected 5 fields + command), using default")
-            validated_lines.append(f"{default_schedule} {cmd}")
-    
-    # Ensure we have at least one valid line
-    if not validated_lines:
-        validated_lines = [f"{default_schedule} {cmd}"]
+    cron_lines = _build_cron_lines(schedule_input, cmd, default_schedule)
     
     # Debug: show what will be installed
     click.echo("\nCron entries to be installed:")
-    for ln in validated_lines:
+    for ln in cron_lines:
         click.echo(f"  {ln}")
     click.echo()
     
-    _install_crontab(validated_lines)
+    _install_crontab(cron_lines)
     click.echo("✓ Cron entries installed successfully!")
 
 
+def _get_conn_manager(ctx) -> ConnectionManager:
+    """Return the ConnectionManager shared through ctx.obj, creating it on first use."""
+    obj = ctx.ensure_object(dict)
+    if "conn_manager" not in obj:
+        obj["conn_manager"] = ConnectionManager()
+    return obj["conn_manager"]
+
+
 @click.group()
 @click.pass_context
 def cli(ctx):
@@ -367,17 +409,23 @@ def cli(ctx):
 @click.option('--backup-dir', help='Local directory to store backups in.')
 @click.option('--mysqldump', 'mysqldump_path', help='Path to mysqldump binary.')
 @click.option('--compress/--no-compress', default=True, show_default=True, help='Compress backups with gzip.')
-def backup(config, connection_name, retention, storage_type, backup_dir, mysqldump_path, compress):
+@click.pass_context
+def backup(ctx, config, connection_name, retention, storage_type, backup_dir, mysqldump_path, compress):
     """Run backup for a database connection."""
     # Resolve config path; env var DATABASE_BACKUP_CONFIG can override default
     if not config:
         config = os.getenv("DATABASE_BACKUP_CONFIG") or _default_config_path()
     
-    _ensure_config_file(config)
-    load_dotenv(dotenv_path=config)
+    # Only offer interactive setup when attached to a terminal; cron runs must never block on a prompt
+    if sys.stdin is not None and sys.stdin.isatty():
+        env = _ensure_config_file(config)
+    else:
+        env = _ensure_config_file_noninteractive(config)
+    # Same semantics as load_dotenv(): existing environment variables take precedence
+    os.environ.update({k: v for k, v in env.items() if v is not None and k not in os.environ})
 
     # Load connection from JSON
-    conn_manager = ConnectionManager()
+    conn_manager = _get_conn_manager(ctx)
     
     if not connection_name:
         # If no connection specified, list available and prompt
@@ -389,15 +437,7 @@ def backup(config, connection_name, retention, storage_type, backup_dir, mysqldu
             connection_name = connections[0]
             click.echo(f"Using connection: {connection_name}")
         else:
-            click.echo("Available connections:")
-            for i, conn in enumerate(connections, 1):
-                click.echo(f"  {i}. {conn}")
-            choice = click.prompt("Select connection", type=int)
-            if 1 <= choice <= len(connections):
-                connection_name = connections[choice - 1]
-            else:
-                click.echo("Invalid selection.")
-                return
+            connection_name = click.prompt("Select connection", type=click.Choice(connections))
     
     conn_data = conn_manager.get_connection(connection_name)
     if not conn_data:
@@ -437,6 +477,15 @@ def backup(config, connection_name, retention, storage_type, backup_dir, mysqldu
             click.echo("  pip install -e .", err=True)
             return
     
+    try:  # package context
+        from ..data.database_gateway import DatabaseGateway  # type: ignore
+        from ..data.storage_gateway import StorageGateway  # type: ignore
+        from ..app.backup_use_case import BackupUseCase  # type: ignore
+    except Exception:  # script context
+        from data.database_gateway import DatabaseGateway  # type: ignore
+        from data.storage_gateway import StorageGateway  # type: ignore
+        from app.backup_use_case import BackupUseCase  # type: ignore
+
     db_gateway = DatabaseGateway(
         mysql_host,
         mysql_port,
@@ -523,10 +572,13 @@ def backup(config, connection_name, retention, storage_type, backup_dir, mysqldu
 @click.option('--bastion-port', type=int, default=22, help='Bastion SSH port (default: 22).')
 @click.option('--bastion-user', help='Bastion SSH username (optional, uses ssh-user if not provided).')
 @click.option('--bastion-key-path', help='Bastion SSH key path (optional, uses ssh-key-path if not provided).')
-def add(name, host, port, user, password, mysqldump_path, excluded, storage_driver, path, s3_bucket,
+@click.pass_context
+def add(ctx, name, host, port, user, password, mysqldump_path, excluded, storage_driver, path, s3_bucket,
         ssh_host, ssh_port, ssh_user, ssh_key_path, bastion_host, bastion_port, bastion_user, bastion_key_path):
     """Add a new database connection."""
-    conn_manager = ConnectionManager()
+    import shutil
+
+    conn_manager = _get_conn_manager(ctx)
     
     existing = conn_manager.get_connection(name)
     if existing:
@@ -773,9 +825,10 @@ def add(name, host, port, user, password, mysqldump_path, excluded, storage_driv
 
 @cli.command()
 @click.option('--name', prompt='Connection name', help='Name of the connection to remove.')
-def remove(name):
+@click.pass_context
+def remove(ctx, name):
     """Remove a database connection."""
-    conn_manager = ConnectionManager()
+    conn_manager = _get_conn_manager(ctx)
     
     if not conn_manager.get_connection(name):
         click.echo(f"Connection '{name}' not found.")
@@ -791,18 +844,18 @@ def remove(name):
 
 
 @cli.command(name='list')
-def list_connections():
+@click.pass_context
+def list_connections(ctx):
     """List all database connections."""
-    conn_manager = ConnectionManager()
-    connections = conn_manager.list_connections()
+    conn_manager = _get_conn_manager(ctx)
+    connections = conn_manager.get_all_connections()
     
     if not connections:
         click.echo("No connections found. Use 'db-backup add' to add a connection.")
         return
     
     click.echo("Available connections:")
-    for conn_name in connections:
-        conn_data = conn_manager.get_connection(conn_name)
+    for conn_name, conn_data in connections.items():
         storage_info = ""
         if conn_data.get("storage_driver"):
             storage_info = f" [storage: {conn_data['storage_driver']}"
@@ -827,11 +880,12 @@ def init(config):
 
 @cli.command()
 @click.option('--config', default=None, help='Path to the .env file (defaults to ~/.config/database-backup/.env).')
-def cron(config):
+@click.pass_context
+def cron(ctx, config):
     """Interactively set up crontab (default daily at 03:00 and 15:00)."""
     if not config:
         config = os.getenv("DATABASE_BACKUP_CONFIG") or _default_config_path()
-    _setup_cron_interactive(config)
+    _setup_cron_interactive(config, _get_conn_manager(ctx))
 
 
 # For backward compatibility, make backup_cli point to the group